@@ -1,10 +1,9 @@
 import streamlit as st
 import matplotlib.pyplot as plt
+from src.config import Config
 from src.core import SkillRecommender
 from src.nlp_utils import find_similar_job_titles, extract_skills_from_resume
 import pandas as pd
-import os
-import tempfile
 
 # Configure page
 st.set_page_config(page_title="Job Skills Recommender", layout="wide")
@@ -130,16 +129,13 @@ with col2:
     st.write("📄 Upload your resume to extract skills")
     uploaded_file = st.file_uploader("Choose a file", type=['pdf', 'docx', 'txt'])
     
-    if uploaded_file is not None:
-        # Create a temporary file to store the uploaded content
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(uploaded_file.name)[1]) as temp_file:
-            temp_file.write(uploaded_file.getvalue())
-            temp_file_path = temp_file.name
-        
+    if uploaded_file is not None and uploaded_file.size > Config.MAX_UPLOAD_BYTES:
+        st.error(f"File too large: resumes must be under {Config.MAX_UPLOAD_BYTES // (1024 * 1024)} MB.")
+    elif uploaded_file is not None:
         try:
-            # Extract skills from the resume
+            # Extract skills straight from the in-memory upload
             with st.spinner("Extracting skills from resume..."):
-                extracted_skills = extract_skills_from_resume(temp_file_path)
+                extracted_skills = extract_skills_from_resume(uploaded_file, uploaded_file.name)
                 st.session_state.extracted_skills = extracted_skills
                 
                 if extracted_skills:
@@ -150,9 +146,6 @@ with col2:
                     st.warning("No skills were detected in the uploaded resume.")
         except Exception as e:
             st.error(f"Error extracting skills: {str(e)}")
-        finally:
-            # Clean up the temporary file
-            os.unlink(temp_file_path)
     
     st.markdown("</div>", unsafe_allow_html=True)
 
@@ -1,7 +1,15 @@
 from .core import SkillRecommender
-from .nlp_utils import find_similar_job_titles
+from .nlp_utils import (
+    find_similar_job_titles, batch_find_similar_job_titles, batch_normalize_skills, warm_up
+)
 from .config import Config
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import contextlib
+import json
+import math
 import sys
+import threading
 
 def display_recommendations(recommendations, match_percentage):
     """Display recommendations in a user-friendly format"""
@@ -20,11 +28,135 @@ def display_recommendations(recommendations, match_percentage):
         print(f"   - URL: {rec['url']}")
     print("=" * 80)
 
-def main():
-    """Main interactive CLI interface"""
+def parse_batch_line(line):
+    """Split a 'job_title<TAB>skills' line into a title and a skill list"""
+    job_title, _, skills = line.rstrip('\r\n').partition('\t')
+    current_skills = [s.strip() for s in skills.split(',') if s.strip()]
+    return job_title.strip(), current_skills
+
+def resolve_batch_titles(recommender, entries, pool):
+    """Resolve each entry's required skills, falling back to the closest similar title
+    
+    Titles without an exact database match are encoded together rather
+    than one model call per line.
+    """
+    required = list(pool.map(lambda e: recommender.get_required_skills(e[1]), entries))
+    unknown = [e[1] for e, skills in zip(entries, required) if not skills]
+    similar = batch_find_similar_job_titles(unknown) if unknown else {}
+    
+    fallback_skills = {}
+    resolved = []
+    for (_, job_title, _), required_skills in zip(entries, required):
+        matched_title = job_title
+        if not required_skills:
+            similar_jobs = similar.get(job_title.lower())
+            if similar_jobs:
+                matched_title = similar_jobs[0][0]
+                if matched_title not in fallback_skills:
+                    fallback_skills[matched_title] = recommender.get_required_skills(matched_title)
+                required_skills = fallback_skills[matched_title]
+        resolved.append((matched_title, required_skills))
+    return resolved
+
+def to_json_value(value):
+    """Convert numpy/pandas values to plain JSON types, mapping NaN to None"""
+    if isinstance(value, dict):
+        return {str(k): to_json_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json_value(v) for v in value]
+    if hasattr(value, 'item') and not isinstance(value, (str, bytes)):
+        value = value.item()  # numpy scalars
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+def process_batch_entry(recommender, line_no, job_title, current_skills, required_skills, matched_title, top_n,
+                        normalizations=None):
+    """Build the JSONL record for one batch input line"""
+    record = {
+        'line': line_no,
+        'job_title': job_title,
+        'matched_title': matched_title if required_skills else None,
+        'current_skills': current_skills,
+    }
+    if not required_skills:
+        record['error'] = 'Job title not found'
+        return record
+    
+    record['required_skills'] = required_skills
+    record['match_percentage'] = recommender.calculate_match_percentage(
+        required_skills, current_skills, normalizations=normalizations
+    )
+    record['recommendations'] = recommender.recommend_courses(
+        required_skills, current_skills, top_n=top_n, normalizations=normalizations
+    )
+    return record
+
+def run_batch(recommender, infile, outfile, workers=4, top_n=5):
+    """Process 'job_title<TAB>skills' lines from infile and write JSONL to outfile"""
+    entries = []
+    for line_no, line in enumerate(infile, 1):
+        if not line.strip():
+            continue
+        job_title, current_skills = parse_batch_line(line)
+        entries.append((line_no, job_title, current_skills))
+    
+    if not entries:
+        return 0
+    
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Resolve titles first so every skill in the batch is known up front
+        resolved = resolve_batch_titles(recommender, entries, pool)
+        
+        # Normalize all distinct skills in chunked encoder passes; per-line
+        # work then reads this dict instead of calling the model
+        all_skills = set()
+        for (_, _, current_skills), (_, required_skills) in zip(entries, resolved):
+            all_skills.update(current_skills)
+            all_skills.update(required_skills or [])
+        normalizations = batch_normalize_skills(all_skills)
+        
+        records = pool.map(
+            lambda item: process_batch_entry(
+                recommender, *item[0],
+                required_skills=item[1][1], matched_title=item[1][0], top_n=top_n,
+                normalizations=normalizations
+            ),
+            zip(entries, resolved)
+        )
+        for record in records:
+            outfile.write(json.dumps(to_json_value(record), allow_nan=False, default=str) + '\n')
+    
+    outfile.flush()
+    return len(entries)
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Job Skills Recommender System")
+    parser.add_argument('--batch', action='store_true',
+                        help="read 'job_title<TAB>skills' lines from stdin and write JSONL to stdout")
+    parser.add_argument('--workers', type=int, default=4,
+                        help="number of worker threads used in batch mode")
+    parser.add_argument('--top-n', type=int, default=5,
+                        help="number of course recommendations per job title")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Main CLI entry point, interactive unless --batch is given"""
+    args = parse_args(argv)
     try:
         recommender = SkillRecommender()
         
+        if args.batch:
+            # Keep diagnostic prints from the lookup helpers out of the JSONL stream
+            outfile = sys.stdout
+            with contextlib.redirect_stdout(sys.stderr):
+                run_batch(recommender, sys.stdin, outfile, workers=max(1, args.workers), top_n=args.top_n)
+            return
+        
+        # Load the model and indexes while the user is typing
+        threading.Thread(target=warm_up, daemon=True).start()
+        
         print("\nJob Skills Recommender System")
         print("=" * 80)
         
@@ -61,7 +193,7 @@ def main():
                 current_skills = [s.strip() for s in current_skills.split(',')] if current_skills else []
                 
                 # Generate and display recommendations
-                recommendations = recommender.recommend_courses(required_skills, current_skills)
+                recommendations = recommender.recommend_courses(required_skills, current_skills, top_n=args.top_n)
                 match_percentage = recommender.calculate_match_percentage(required_skills, current_skills)
                 
                 display_recommendations(recommendations, match_percentage)
@@ -71,10 +203,11 @@ def main():
                 print("\nNo skills data available for this job title.")
                 
     except KeyboardInterrupt:
-        print("\n\nExiting...")
-        sys.exit(0)
+        print("\n\nExiting...", file=sys.stderr if args.batch else sys.stdout)
+        # An interrupted batch has written partial output, so don't report success
+        sys.exit(130 if args.batch else 0)
     except Exception as e:
-        print(f"\nFatal error: {str(e)}")
+        print(f"\nFatal error: {str(e)}", file=sys.stderr if args.batch else sys.stdout)
         sys.exit(1)
 
 if __name__ == '__main__':
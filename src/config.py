@@ -10,6 +10,25 @@ class Config:
     COURSES_PATH = BASE_DATA_DIR / 'course_database.csv'
     SKILL_ALIASES_PATH = BASE_DATA_DIR / 'skill_aliases.json'
     MODEL_NAME = 'all-MiniLM-L6-v2'
+    NORMALIZED_CACHE_SIZE = 10000
+    ENCODE_BATCH_SIZE = 256
+    
+    # Shared model serving: replicas memory-map precomputed embeddings and
+    # send novel strings to a single encoder worker (src.model_server)
+    USE_SHARED_MODEL = os.environ.get('RECOMMENDER_SHARED_MODEL', '0') == '1'
+    SHARED_INDEX_DIR = BASE_DATA_DIR / 'shared_index'
+    ENCODER_ADDRESS = ('127.0.0.1', int(os.environ.get('RECOMMENDER_ENCODER_PORT', '6070')))
+    # No default: the worker refuses to start, and shared mode refuses to
+    # run, until a private key is configured
+    ENCODER_AUTHKEY = os.environ.get('RECOMMENDER_ENCODER_AUTHKEY', '').encode()
+    MAX_ENCODE_REQUEST_BYTES = 4 * 1024 * 1024
+    
+    # Resume extraction limits, so hostile or huge uploads stay cheap to parse
+    MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+    MAX_DOCX_XML_BYTES = 20 * 1024 * 1024
+    MAX_TEXT_CHARS = 200000
+    TEXT_SNIFF_BYTES = 64 * 1024
+    DOCX_READ_CHUNK_BYTES = 64 * 1024
     
     @classmethod
     def verify_paths(cls):
@@ -31,6 +50,15 @@ class Config:
                 "\n".join(missing_files) +
                 "\nPlease ensure all data files are in the correct location."
             )
+    
+    @classmethod
+    def verify_shared_mode(cls):
+        """Refuse shared mode without a private encoder authkey"""
+        if cls.USE_SHARED_MODEL and not cls.ENCODER_AUTHKEY:
+            raise RuntimeError(
+                "RECOMMENDER_SHARED_MODEL=1 requires RECOMMENDER_ENCODER_AUTHKEY to be set"
+            )
 
 # Verify paths when module is imported
-Config.verify_paths()
\ No newline at end of file
+Config.verify_paths()
+Config.verify_shared_mode()
\ No newline at end of file
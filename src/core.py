@@ -40,14 +40,14 @@ class SkillRecommender:
             print(f"Error fetching skills: {str(e)}")
             return None
     
-    def recommend_courses(self, required_skills, current_skills=None, top_n=5):
+    def recommend_courses(self, required_skills, current_skills=None, top_n=5, normalizations=None):
         """Generate personalized course recommendations"""
         try:
             if not required_skills:
                 return []
                 
-            norm_required = [enhanced_normalize_skill(s) for s in required_skills]
-            norm_current = [enhanced_normalize_skill(s) for s in current_skills] if current_skills else []
+            norm_required = [enhanced_normalize_skill(s, normalizations=normalizations) for s in required_skills]
+            norm_current = [enhanced_normalize_skill(s, normalizations=normalizations) for s in current_skills] if current_skills else []
             
             # Calculate skill gaps
             skill_gaps = list(set(norm_required) - set(norm_current))
@@ -85,14 +85,14 @@ class SkillRecommender:
             print(f"Error generating recommendations: {str(e)}")
             return []
     
-    def calculate_match_percentage(self, required_skills, current_skills=None):
+    def calculate_match_percentage(self, required_skills, current_skills=None, normalizations=None):
         """Calculate skill match percentage"""
         try:
             if not required_skills:
                 return 0.0
                 
-            norm_required = [enhanced_normalize_skill(s) for s in required_skills]
-            norm_current = [enhanced_normalize_skill(s) for s in current_skills] if current_skills else []
+            norm_required = [enhanced_normalize_skill(s, normalizations=normalizations) for s in required_skills]
+            norm_current = [enhanced_normalize_skill(s, normalizations=normalizations) for s in current_skills] if current_skills else []
             
             matched = set(norm_required) & set(norm_current)
             return (len(matched) / len(norm_required)) * 100
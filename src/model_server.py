@@ -0,0 +1,268 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+from multiprocessing.connection import Listener, Client
+
+import numpy as np
+
+from .config import Config
+
+MANIFEST_FILE = 'manifest.json'
+ALIASES_FILE = 'skill_aliases.json'
+ALIAS_EMBEDDINGS_FILE = 'alias_embeddings.npy'
+TITLES_FILE = 'job_titles.json'
+TITLE_EMBEDDINGS_FILE = 'title_embeddings.npy'
+VOCABULARY_FILE = 'skill_vocabulary.json'
+VOCABULARY_EMBEDDINGS_FILE = 'vocabulary_embeddings.npy'
+
+# Encoder wire protocol: requests are a JSON list of strings, responses are
+# a status byte followed by raw float32 rows or a UTF-8 error message.
+# Nothing is ever pickled, so a peer can't smuggle code into either side.
+RESPONSE_OK = b'A'
+RESPONSE_ERROR = b'E'
+
+class SharedIndexError(RuntimeError):
+    """The shared index is missing, incomplete or built from other sources"""
+
+def require_authkey(authkey=None):
+    """Return the encoder authkey, refusing to run without one"""
+    authkey = authkey or Config.ENCODER_AUTHKEY
+    if not authkey:
+        raise RuntimeError("RECOMMENDER_ENCODER_AUTHKEY must be set to use the shared encoder worker")
+    return authkey
+
+def normalize_embeddings(embeddings):
+    """L2-normalize rows so cosine similarity becomes a plain dot product"""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if embeddings.ndim != 2 or embeddings.shape[0] == 0:
+        return embeddings
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return embeddings / norms
+
+def aliases_fingerprint():
+    """Hash the skill aliases file the index was built from"""
+    with open(Config.SKILL_ALIASES_PATH, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def titles_fingerprint(titles):
+    """Hash a set of job titles independently of database row order"""
+    return hashlib.sha256(json.dumps(sorted(titles)).encode('utf-8')).hexdigest()
+
+def _write_atomic(path, write):
+    """Write a file via a temp path so readers never see a partial file"""
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+def _write_json(path, data):
+    _write_atomic(path, lambda f: f.write(json.dumps(data).encode('utf-8')))
+
+def _write_embeddings(path, embeddings):
+    _write_atomic(path, lambda f: np.save(f, embeddings))
+
+def build_shared_index(index_dir=None):
+    """Encode aliases, job titles and the skill vocabulary once and store them for memory-mapping"""
+    from .nlp_utils import load_skill_aliases, get_all_job_titles, get_known_skills
+    from sentence_transformers import SentenceTransformer
+
+    index_dir = index_dir or Config.SHARED_INDEX_DIR
+    index_dir.mkdir(parents=True, exist_ok=True)
+    model = SentenceTransformer(Config.MODEL_NAME)
+
+    skill_aliases = load_skill_aliases()
+    titles = get_all_job_titles()
+    vocabulary = get_known_skills()
+
+    _write_json(index_dir / ALIASES_FILE, skill_aliases)
+    _write_json(index_dir / TITLES_FILE, titles)
+    _write_json(index_dir / VOCABULARY_FILE, vocabulary)
+    _write_embeddings(index_dir / ALIAS_EMBEDDINGS_FILE, normalize_embeddings(model.encode(list(skill_aliases.keys()))))
+    _write_embeddings(index_dir / TITLE_EMBEDDINGS_FILE, normalize_embeddings(model.encode(titles)))
+    _write_embeddings(index_dir / VOCABULARY_EMBEDDINGS_FILE, normalize_embeddings(model.encode(vocabulary)))
+
+    # Written last, so a build interrupted halfway never looks valid
+    _write_json(index_dir / MANIFEST_FILE, {
+        'model_name': Config.MODEL_NAME,
+        'aliases_sha256': aliases_fingerprint(),
+        'titles_sha256': titles_fingerprint(titles),
+    })
+    return index_dir
+
+def _read_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        raise SharedIndexError(f"Cannot read shared index file {path}: {str(e)}")
+
+def _check_manifest(index_dir, **expected):
+    """Reject an index built with another model or from other source data"""
+    manifest = _read_json(index_dir / MANIFEST_FILE)
+    expected['model_name'] = Config.MODEL_NAME
+    for key, value in expected.items():
+        if manifest.get(key) != value:
+            raise SharedIndexError(
+                f"Shared index in {index_dir} is stale ({key} changed); "
+                "rerun 'python -m src.model_server build'"
+            )
+
+def _load_embeddings(path, count):
+    """Memory-map an embedding matrix, returning None for empty indexes"""
+    if count == 0:
+        return None
+    try:
+        embeddings = np.load(path, mmap_mode='r')
+    except (OSError, ValueError) as e:
+        raise SharedIndexError(f"Cannot read shared index file {path}: {str(e)}")
+    if embeddings.ndim != 2 or embeddings.shape[0] != count:
+        raise SharedIndexError(f"Shared index {path.name} is out of sync with its labels")
+    return embeddings
+
+def load_shared_alias_index(index_dir=None):
+    """Load the alias index with a memory-mapped embedding matrix"""
+    index_dir = index_dir or Config.SHARED_INDEX_DIR
+    _check_manifest(index_dir, aliases_sha256=aliases_fingerprint())
+    skill_aliases = _read_json(index_dir / ALIASES_FILE)
+    known_skills = list(skill_aliases.keys())
+    return skill_aliases, known_skills, _load_embeddings(index_dir / ALIAS_EMBEDDINGS_FILE, len(known_skills))
+
+def load_shared_title_index(current_titles, index_dir=None):
+    """Load the job title index with a memory-mapped embedding matrix"""
+    index_dir = index_dir or Config.SHARED_INDEX_DIR
+    _check_manifest(index_dir, titles_sha256=titles_fingerprint(current_titles))
+    titles = _read_json(index_dir / TITLES_FILE)
+    return titles, _load_embeddings(index_dir / TITLE_EMBEDDINGS_FILE, len(titles))
+
+def load_shared_vocabulary_index(index_dir=None):
+    """Load the known skill vocabulary with a memory-mapped embedding matrix"""
+    index_dir = index_dir or Config.SHARED_INDEX_DIR
+    _check_manifest(index_dir, aliases_sha256=aliases_fingerprint())
+    vocabulary = _read_json(index_dir / VOCABULARY_FILE)
+    return vocabulary, _load_embeddings(index_dir / VOCABULARY_EMBEDDINGS_FILE, len(vocabulary))
+
+class RemoteEncoder:
+    """Drop-in stand-in for SentenceTransformer that encodes via the encoder worker"""
+
+    def __init__(self, address=None, authkey=None):
+        self.address = address or Config.ENCODER_ADDRESS
+        self.authkey = require_authkey(authkey)
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = Client(self.address, authkey=self.authkey)
+            self._local.conn = conn
+        return conn
+
+    def _split_requests(self, sentences):
+        """Split sentences into JSON payloads the worker will accept"""
+        limit = Config.MAX_ENCODE_REQUEST_BYTES
+        batch, size = [], 2  # the enclosing brackets
+        for sentence in sentences:
+            item_size = len(json.dumps(sentence).encode('utf-8')) + 2  # plus the ', ' separator
+            if item_size + 2 > limit:
+                raise ValueError(
+                    f"Encode request too large: one string needs {item_size} bytes, "
+                    f"the worker accepts {limit}"
+                )
+            if batch and size + item_size > limit:
+                yield len(batch), json.dumps(batch).encode('utf-8')
+                batch, size = [], 2
+            batch.append(sentence)
+            size += item_size
+        if batch:
+            yield len(batch), json.dumps(batch).encode('utf-8')
+
+    def encode(self, sentences):
+        """Encode sentences on the encoder worker, splitting requests over its size limit"""
+        sentences = [str(s) for s in sentences]
+        if not sentences:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.vstack([self._send(count, payload) for count, payload in self._split_requests(sentences)])
+
+    def _send(self, count, payload):
+        """Send one request payload, reconnecting once on failure"""
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                conn.send_bytes(payload)
+                response = conn.recv_bytes()
+                break
+            except (EOFError, OSError):
+                self._local.conn = None
+                if attempt:
+                    raise RuntimeError(f"Encoder worker unavailable at {self.address}")
+
+        status, body = response[:1], response[1:]
+        if status != RESPONSE_OK:
+            raise RuntimeError(f"Encoder worker error: {body.decode('utf-8', 'replace')}")
+        return np.frombuffer(body, dtype=np.float32).reshape(count, -1)
+
+def _encode_request(model, lock, data):
+    """Encode one JSON request, returning the response bytes"""
+    try:
+        sentences = json.loads(data.decode('utf-8'))
+        if not isinstance(sentences, list) or not all(isinstance(s, str) for s in sentences):
+            raise ValueError("Expected a JSON list of strings")
+        with lock:
+            embeddings = model.encode(sentences)
+        return RESPONSE_OK + np.asarray(embeddings, dtype=np.float32).tobytes()
+    except Exception as e:
+        return RESPONSE_ERROR + str(e).encode('utf-8')
+
+def _handle_client(conn, model, lock):
+    """Serve encode requests for one connected replica"""
+    try:
+        while True:
+            # Oversized requests raise OSError and drop the connection
+            data = conn.recv_bytes(Config.MAX_ENCODE_REQUEST_BYTES)
+            conn.send_bytes(_encode_request(model, lock, data))
+    except (EOFError, OSError):
+        pass
+    finally:
+        conn.close()
+
+def serve_encoder(address=None, authkey=None):
+    """Run the single encoder worker that replicas send novel strings to"""
+    authkey = require_authkey(authkey)
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(Config.MODEL_NAME)
+    lock = threading.Lock()
+    with Listener(address or Config.ENCODER_ADDRESS, authkey=authkey) as listener:
+        print(f"Encoder worker listening on {listener.address}")
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                print(f"Error accepting encoder connection: {str(e)}")
+                continue
+            threading.Thread(target=_handle_client, args=(conn, model, lock), daemon=True).start()
+
+def main(argv=None):
+    """Build the shared index or run the encoder worker"""
+    parser = argparse.ArgumentParser(description="Shared model serving for the recommender")
+    parser.add_argument('command', choices=['build', 'serve'],
+                        help="'build' writes the memory-mapped indexes, 'serve' runs the encoder worker")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'build':
+            index_dir = build_shared_index()
+            print(f"Shared index written to {index_dir}")
+        else:
+            serve_encoder()
+    except KeyboardInterrupt:
+        sys.exit(0)
+    except RuntimeError as e:
+        print(f"Fatal error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -1,36 +1,66 @@
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
 import sqlite3
 import json
 from .config import Config
+from .model_server import (
+    RemoteEncoder, SharedIndexError, normalize_embeddings,
+    load_shared_alias_index, load_shared_title_index, load_shared_vocabulary_index
+)
 import re
 import os
+import io
+import codecs
+import contextlib
+import sys
 import tempfile
+import threading
+from collections import OrderedDict
+import zipfile
+from xml.parsers import expat
 
 # For handling different document types
 import PyPDF2
-import docx
-import spacy
-import nltk
-from nltk.corpus import stopwords
 
 # Initialize lazy-loaded resources
 model = None
 nlp = None
 stop_words = None
+alias_index = None
+title_index = None
+vocabulary_index = None
+
+# Bounded LRU of semantic normalizations keyed by (skill_lower, threshold);
+# None marks a skill with no alias above the threshold
+normalized_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_UNCACHED = object()
+
+# Guards lazy loading so a background warm-up and a foreground lookup
+# never build the same resource twice
+_load_lock = threading.RLock()
 
 def load_model():
-    """Lazy-load the sentence transformer model"""
+    """Lazy-load the sentence transformer model, or a client for the shared encoder worker"""
     global model
     if model is None:
-        model = SentenceTransformer(Config.MODEL_NAME)
+        with _load_lock:
+            if model is None:
+                if Config.USE_SHARED_MODEL:
+                    model = RemoteEncoder()
+                else:
+                    # Imported here so shared-mode replicas don't load the
+                    # sentence transformer stack unless they need it
+                    from sentence_transformers import SentenceTransformer
+                    model = SentenceTransformer(Config.MODEL_NAME)
     return model
 
 def load_spacy():
     """Lazy-load spaCy model"""
     global nlp
     if nlp is None:
+        # Imported here because spaCy pulls in torch via thinc when it is
+        # installed; replicas that never parse a resume skip that cost
+        import spacy
         try:
             nlp = spacy.load("en_core_web_sm")
         except OSError:
@@ -43,6 +73,8 @@ def load_nltk_resources():
     """Lazy-load NLTK resources"""
     global stop_words
     if stop_words is None:
+        import nltk
+        from nltk.corpus import stopwords
         try:
             stop_words = set(stopwords.words('english'))
         except LookupError:
@@ -58,24 +90,159 @@ def load_skill_aliases():
     except Exception as e:
         raise RuntimeError(f"Failed to load skill aliases: {str(e)}")
 
-def enhanced_normalize_skill(skill, threshold=0.7):
-    """Normalize skill name using semantic matching"""
+def encode_index(labels):
+    """Encode index labels into L2-normalized rows, or None when there are none"""
+    return normalize_embeddings(load_model().encode(labels)) if labels else None
+
+def cosine_scores(query_embeddings, index_embeddings):
+    """Cosine similarity of queries against a pre-normalized index
+    
+    A plain matrix product reads memory-mapped indexes in place, where
+    sklearn's cosine_similarity would copy the whole matrix per query.
+    """
+    return normalize_embeddings(query_embeddings) @ index_embeddings.T
+
+def load_shared_or_none(loader, *args):
+    """Load a shared index, returning None so the caller encodes locally instead"""
+    if not Config.USE_SHARED_MODEL:
+        return None
     try:
-        model = load_model()
-        skill_aliases = load_skill_aliases()
+        return loader(*args)
+    except SharedIndexError as e:
+        print(f"{str(e)}; encoding the index in this process instead", file=sys.stderr)
+        return None
+
+def load_alias_index():
+    """Lazy-load skill aliases together with the embeddings of their keys"""
+    global alias_index
+    if alias_index is None:
+        with _load_lock:
+            if alias_index is None:
+                alias_index = load_shared_or_none(load_shared_alias_index)
+            if alias_index is None:
+                skill_aliases = load_skill_aliases()
+                known_skills = list(skill_aliases.keys())
+                alias_index = (skill_aliases, known_skills, encode_index(known_skills))
+    return alias_index
+
+def load_title_index():
+    """Lazy-load job titles together with their embeddings"""
+    global title_index
+    if title_index is None:
+        with _load_lock:
+            if title_index is None:
+                titles = get_all_job_titles()
+                title_index = load_shared_or_none(load_shared_title_index, titles)
+                if title_index is None:
+                    title_index = (titles, encode_index(titles))
+    return title_index
+
+def load_vocabulary_index():
+    """Lazy-load all known skills (alias keys and values) with their embeddings"""
+    global vocabulary_index
+    if vocabulary_index is None:
+        with _load_lock:
+            if vocabulary_index is None:
+                vocabulary_index = load_shared_or_none(load_shared_vocabulary_index)
+            if vocabulary_index is None:
+                known_skills = get_known_skills()
+                vocabulary_index = (known_skills, encode_index(known_skills))
+    return vocabulary_index
+
+def get_cached_normalization(key):
+    """Look up a cached normalization, marking it as recently used"""
+    with _cache_lock:
+        value = normalized_cache.get(key, _UNCACHED)
+        if value is not _UNCACHED:
+            normalized_cache.move_to_end(key)
+        return value
+
+def cache_normalization(key, value):
+    """Store a normalization, evicting the least recently used entries"""
+    with _cache_lock:
+        normalized_cache[key] = value
+        normalized_cache.move_to_end(key)
+        while len(normalized_cache) > Config.NORMALIZED_CACHE_SIZE:
+            normalized_cache.popitem(last=False)
+
+def warm_up():
+    """Preload the model and lookup indexes so later queries don't stall"""
+    try:
+        load_model()
+        load_alias_index()
+        load_title_index()
+        load_vocabulary_index()
+    except Exception as e:
+        # stderr, so a background failure doesn't land in an input() prompt
+        print(f"Error warming up resources: {str(e)}", file=sys.stderr)
+
+def iter_encoded_chunks(texts):
+    """Encode texts in Config.ENCODE_BATCH_SIZE chunks, yielding (chunk, embeddings)"""
+    model = load_model()
+    for start in range(0, len(texts), Config.ENCODE_BATCH_SIZE):
+        chunk = texts[start:start + Config.ENCODE_BATCH_SIZE]
+        yield chunk, model.encode(chunk)
+
+def batch_normalize_skills(skills, threshold=0.7):
+    """Normalize many skill names with chunked encoder calls
+    
+    Returns a dict mapping each lowercased skill to its alias, or to None
+    when nothing is above the threshold. Skills that could not be scored
+    are left out, so callers fall back to enhanced_normalize_skill.
+    """
+    normalizations = {}
+    try:
+        skill_aliases, known_skills, known_embeddings = load_alias_index()
+        
+        pending = set()
+        for skill in skills:
+            skill_lower = skill.lower().strip()
+            if skill_lower in skill_aliases:
+                normalizations[skill_lower] = skill_aliases[skill_lower]
+            else:
+                pending.add(skill_lower)
+        
+        if known_embeddings is None:
+            normalizations.update(dict.fromkeys(pending))
+            return normalizations
+        
+        for chunk, embeddings in iter_encoded_chunks(sorted(pending)):
+            similarities = cosine_scores(embeddings, known_embeddings)
+            for skill_lower, row in zip(chunk, similarities):
+                max_idx = row.argmax()
+                normalizations[skill_lower] = skill_aliases[known_skills[max_idx]] if row[max_idx] > threshold else None
+    except Exception as e:
+        print(f"Error batch normalizing skills: {str(e)}")
+    return normalizations
+
+def enhanced_normalize_skill(skill, threshold=0.7, normalizations=None):
+    """Normalize skill name using semantic matching
+    
+    normalizations, as returned by batch_normalize_skills, is consulted
+    before the shared cache and the model.
+    """
+    try:
+        skill_aliases, known_skills, known_embeddings = load_alias_index()
         
         skill_lower = skill.lower().strip()
         if skill_lower in skill_aliases:
             return skill_aliases[skill_lower]
-            
-        skill_embedding = model.encode([skill_lower])
-        known_skills = list(skill_aliases.keys())
-        known_embeddings = model.encode(known_skills)
-        
-        similarities = cosine_similarity(skill_embedding, known_embeddings)[0]
-        max_idx = similarities.argmax()
+        if normalizations is not None and skill_lower in normalizations:
+            match = normalizations[skill_lower]
+            return match if match is not None else skill.title()
+        match = get_cached_normalization((skill_lower, threshold))
+        if match is _UNCACHED:
+            match = None
+            if known_embeddings is not None:
+                skill_embedding = load_model().encode([skill_lower])
+                
+                similarities = cosine_scores(skill_embedding, known_embeddings)[0]
+                max_idx = similarities.argmax()
+                if similarities[max_idx] > threshold:
+                    match = skill_aliases[known_skills[max_idx]]
+            cache_normalization((skill_lower, threshold), match)
         
-        return skill_aliases[known_skills[max_idx]] if similarities[max_idx] > threshold else skill.title()
+        return match if match is not None else skill.title()
     except Exception as e:
         print(f"Error normalizing skill '{skill}': {str(e)}")
         return skill.title()
@@ -90,79 +257,242 @@ def get_all_job_titles():
     except Exception as e:
         raise RuntimeError(f"Database error: {str(e)}")
 
+def top_title_matches(titles, similarities, threshold, top_n):
+    """Pick the best scoring titles above the threshold"""
+    top_indices = np.argsort(similarities)[-top_n:][::-1]
+    return [(titles[i], float(similarities[i])) for i in top_indices if similarities[i] > threshold]
+
 def find_similar_job_titles(query, threshold=0.7, top_n=3):
     """Find similar job titles using semantic search"""
     try:
-        model = load_model()
-        titles = get_all_job_titles()
+        titles, title_embeddings = load_title_index()
         if not titles:
             return []
             
-        title_embeddings = model.encode(titles)
-        query_embedding = model.encode([query.lower()])
-        
-        similarities = cosine_similarity(query_embedding, title_embeddings)[0]
-        top_indices = np.argsort(similarities)[-top_n:][::-1]
+        query_embedding = load_model().encode([query.lower()])
         
-        return [(titles[i], float(similarities[i])) for i in top_indices if similarities[i] > threshold]
+        similarities = cosine_scores(query_embedding, title_embeddings)[0]
+        return top_title_matches(titles, similarities, threshold, top_n)
     except Exception as e:
         print(f"Error finding similar jobs: {str(e)}")
         return []
 
+def batch_find_similar_job_titles(queries, threshold=0.7, top_n=3):
+    """Find similar job titles for many queries with chunked encoder calls
+    
+    Returns a dict keyed by the lowercased query.
+    """
+    results = {}
+    try:
+        titles, title_embeddings = load_title_index()
+        pending = sorted({q.lower() for q in queries})
+        if not titles:
+            return dict.fromkeys(pending, [])
+        
+        for chunk, embeddings in iter_encoded_chunks(pending):
+            for query, similarities in zip(chunk, cosine_scores(embeddings, title_embeddings)):
+                results[query] = top_title_matches(titles, similarities, threshold, top_n)
+    except Exception as e:
+        print(f"Error finding similar jobs: {str(e)}")
+    return results
+
 def get_known_skills():
     """Get a list of all known skills from the aliases"""
     try:
         skill_aliases = load_skill_aliases()
         # Get both the keys (raw skills) and values (normalized skills)
         all_skills = set(skill_aliases.keys()) | set(skill_aliases.values())
-        return list(all_skills)
+        return sorted(all_skills)
     except Exception as e:
         print(f"Error loading known skills: {str(e)}")
         return []
 
+# WordprocessingML tags read by the streaming DOCX parser, as expat
+# reports them with a ' ' namespace separator
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main '
+W_TEXT = W_NS + 't'
+W_BREAKS = (W_NS + 'tab', W_NS + 'br', W_NS + 'cr')
+W_BLOCKS = (W_NS + 'p', W_NS + 'tc')
+
+@contextlib.contextmanager
+def open_binary_source(source):
+    """Open a path, raw bytes or binary file-like object for reading"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        yield io.BytesIO(source)
+    elif hasattr(source, 'read'):
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        yield source
+    else:
+        with open(source, 'rb') as f:
+            yield f
+
+class FileTooLargeError(ValueError):
+    """An upload exceeds Config.MAX_UPLOAD_BYTES"""
+
+def check_upload_size(source):
+    """Raise FileTooLargeError if a path, bytes or file-like upload is over the byte cap"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        size = len(source)
+    elif hasattr(source, 'seek'):
+        source.seek(0, os.SEEK_END)
+        size = source.tell()
+        source.seek(0)
+    elif hasattr(source, 'read'):
+        return  # unseekable streams are bounded by the readers instead
+    else:
+        size = os.path.getsize(source)
+    
+    if size > Config.MAX_UPLOAD_BYTES:
+        raise FileTooLargeError(
+            f"File is too large ({size / 1024 / 1024:.1f} MB); "
+            f"the limit is {Config.MAX_UPLOAD_BYTES / 1024 / 1024:.0f} MB"
+        )
+
+class LimitedReader:
+    """File-like wrapper that stops returning data after a byte limit"""
+    
+    def __init__(self, stream, limit):
+        self.stream = stream
+        self.remaining = limit
+    
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.stream.read(size)
+        self.remaining -= len(data)
+        return data
+
+class DocxTextCollector:
+    """Expat handlers that collect DOCX text, stopping at a character cap"""
+    
+    def __init__(self, max_chars):
+        self.parts = []
+        self.length = 0
+        self.max_chars = max_chars
+        self.in_text = False
+    
+    @property
+    def full(self):
+        return self.length >= self.max_chars
+    
+    def add(self, text):
+        remaining = self.max_chars - self.length
+        if remaining > 0:
+            text = text[:remaining]
+            self.parts.append(text)
+            self.length += len(text)
+    
+    def start(self, name, attrs):
+        if name == W_TEXT:
+            self.in_text = True
+        elif name in W_BREAKS:
+            self.add(" ")
+    
+    def end(self, name):
+        if name == W_TEXT:
+            self.in_text = False
+        elif name in W_BLOCKS:
+            self.add(" ")
+    
+    def data(self, text):
+        if self.in_text:
+            self.add(text)
+    
+    def reject_dtd(self, *args):
+        # Word never writes a DTD; refusing one rules out entity expansion attacks
+        raise ValueError("DOCX XML must not contain a DOCTYPE or entity declarations")
+    
+    def parser(self):
+        parser = expat.ParserCreate(namespace_separator=' ')
+        parser.StartElementHandler = self.start
+        parser.EndElementHandler = self.end
+        parser.CharacterDataHandler = self.data
+        parser.StartDoctypeDeclHandler = self.reject_dtd
+        parser.EntityDeclHandler = self.reject_dtd
+        return parser
+
+def detect_text_encoding(sample):
+    """Guess the encoding of a text file from a prefix sample"""
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    try:
+        # final=False tolerates a multi-byte character cut off by the sample
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'latin-1'
+
 def extract_text_from_pdf(file_path):
-    """Extract text from a PDF file"""
-    text = ""
+    """Extract text from a PDF file path, bytes or file-like object"""
+    parts = []
     try:
-        with open(file_path, 'rb') as file:
+        with open_binary_source(file_path) as file:
             reader = PyPDF2.PdfReader(file)
             for page in reader.pages:
-                text += page.extract_text() + " "
+                parts.append(page.extract_text() or "")
     except Exception as e:
         print(f"Error extracting text from PDF: {str(e)}")
-    return text
+    return " ".join(parts)
 
 def extract_text_from_docx(file_path):
-    """Extract text from a DOCX file"""
-    text = ""
+    """Extract paragraph and table text from a DOCX by streaming its XML"""
+    collector = DocxTextCollector(Config.MAX_TEXT_CHARS)
     try:
-        doc = docx.Document(file_path)
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + " "
+        with open_binary_source(file_path) as file, zipfile.ZipFile(file) as archive:
+            with archive.open('word/document.xml') as xml_file:
+                # Caps decompressed bytes too, so zip bombs stay bounded
+                reader = LimitedReader(xml_file, Config.MAX_DOCX_XML_BYTES)
+                parser = collector.parser()
+                while not collector.full:
+                    chunk = reader.read(Config.DOCX_READ_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    parser.Parse(chunk, False)
     except Exception as e:
         print(f"Error extracting text from DOCX: {str(e)}")
-    return text
+    return "".join(collector.parts)
 
 def extract_text_from_txt(file_path):
-    """Extract text from a plain text file"""
+    """Extract text from a plain text file path, bytes or file-like object"""
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return file.read()
-    except UnicodeDecodeError:
-        # Try with different encoding if UTF-8 fails
+        with open_binary_source(file_path) as file:
+            # Four bytes per character covers every supported encoding
+            data = file.read(Config.MAX_TEXT_CHARS * 4)
+            truncated = bool(file.read(1))
+        
+        encoding = detect_text_encoding(data[:Config.TEXT_SNIFF_BYTES])
         try:
-            with open(file_path, 'r', encoding='latin-1') as file:
-                return file.read()
-        except Exception as e:
-            print(f"Error reading text file: {str(e)}")
-            return ""
+            # final=False keeps a character cut off by the read limit from
+            # counting as a decode error
+            text = codecs.getincrementaldecoder(encoding)().decode(data, final=not truncated)
+        except UnicodeDecodeError:
+            text = data.decode('latin-1')
+        return text[:Config.MAX_TEXT_CHARS]
     except Exception as e:
         print(f"Error reading text file: {str(e)}")
         return ""
 
-def extract_text_from_file(file_path):
-    """Extract text from various file formats"""
-    file_extension = os.path.splitext(file_path)[1].lower()
+def extract_text_from_file(file_path, file_name=None):
+    """Extract text from various file formats
+    
+    file_path may also be bytes or a file-like object, in which case
+    file_name (or the object's own name) supplies the extension.
+    """
+    check_upload_size(file_path)
+    
+    if not file_name:
+        if isinstance(file_path, (str, os.PathLike)):
+            file_name = os.fspath(file_path)
+        else:
+            file_name = getattr(file_path, 'name', None)
+    if not isinstance(file_name, str) or not file_name:
+        raise ValueError("file_name is required to detect the format of in-memory uploads")
+    file_extension = os.path.splitext(file_name)[1].lower()
     
     if file_extension == '.pdf':
         return extract_text_from_pdf(file_path)
@@ -181,8 +511,7 @@ def find_skills_in_text(text, threshold=0.6):
     model = load_model()
     
     # Get known skills for matching
-    known_skills = get_known_skills()
-    known_embeddings = model.encode(known_skills)
+    known_skills, known_embeddings = load_vocabulary_index()
     
     # Clean text
     text = re.sub(r'[^\w\s]', ' ', text.lower())
@@ -229,11 +558,10 @@ def find_skills_in_text(text, threshold=0.6):
     
     # Semantic matching for remaining skills
     remaining_skills = [s for s in filtered_skills if not any(s.lower() == k.lower() for k in known_skills)]
-    if remaining_skills:
-        skill_embeddings = model.encode(remaining_skills)
+    if remaining_skills and known_embeddings is not None:
+        all_similarities = cosine_scores(model.encode(remaining_skills), known_embeddings)
         
-        for i, skill_embedding in enumerate(skill_embeddings):
-            similarities = cosine_similarity([skill_embedding], known_embeddings)[0]
+        for similarities in all_similarities:
             max_idx = similarities.argmax()
             
             if similarities[max_idx] > threshold:
@@ -243,11 +571,11 @@ def find_skills_in_text(text, threshold=0.6):
     
     return list(matched_skills)
 
-def extract_skills_from_resume(file_path):
-    """Extract skills from a resume file"""
+def extract_skills_from_resume(file_path, file_name=None):
+    """Extract skills from a resume file path, bytes or file-like object"""
     try:
         # Extract text from the file
-        text = extract_text_from_file(file_path)
+        text = extract_text_from_file(file_path, file_name)
         if not text:
             return []
         
@@ -256,6 +584,9 @@ def extract_skills_from_resume(file_path):
         
         # Return normalized and deduplicated skills
         return sorted(list(set(skills)))
+    except FileTooLargeError:
+        # Surface to the caller instead of reporting "no skills found"
+        raise
     except Exception as e:
         print(f"Error extracting skills from resume: {str(e)}")
         return []
\ No newline at end of file